@@ -4,7 +4,7 @@ Real Estate Serbia — Airflow DAG
 Runs both scrapers daily at 03:00 AM.
 
 Task order:
-    scrape_nekretnine → scrape_oglasi → validate_data
+    migrate_schema → scrape_nekretnine → scrape_oglasi → validate_data → update_price_index
 """
 
 from airflow import DAG
@@ -36,6 +36,13 @@ with DAG(
     tags=['real_estate', 'scraping'],
 ) as dag:
 
+    # --- TASK 0: bring existing databases up to the current schema ---
+    # init.sql runs automatically only when the postgres volume is first created
+    migrate_schema = BashOperator(
+        task_id='migrate_schema',
+        bash_command='python /opt/airflow/scrapers/migrate_schema.py',
+    )
+
     # --- TASK 1: scrape nekretnine.rs ---
     scrape_nekretnine = BashOperator(
         task_id='scrape_nekretnine',
@@ -77,7 +84,16 @@ with DAG(
         python_callable=validate_data,
     )
 
+    # --- TASK 4: incremental price-per-m² index ---
+    # Applies only today's SCD deltas to price_index_daily
+    update_price_index = BashOperator(
+        task_id='update_price_index',
+        bash_command='python /opt/airflow/scrapers/price_index.py',
+    )
+
     # --- TASK ORDER ---
+    # scrapers write new columns, so the schema is migrated first
     # nekretnine must finish before oglasi starts
     # validation runs only after both scrapers complete
-    scrape_nekretnine >> scrape_oglasi >> validate
\ No newline at end of file
+    # price index is built only from validated data
+    migrate_schema >> scrape_nekretnine >> scrape_oglasi >> validate >> update_price_index
\ No newline at end of file
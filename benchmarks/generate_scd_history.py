@@ -0,0 +1,274 @@
+"""
+Generator sintetičke SCD Type 2 istorije za 'ads' tabelu.
+
+Simulira višegodišnje dnevne run-ove oba izvora: svaki dan deo aktivnih
+oglasa nestaje (removed), deo menja cenu (nova verzija), a novi oglasi
+održavaju populaciju stabilnom. Oglasi su raspoređeni po svim
+(kategorija, transakcija) scope-ovima koje scraperi crawl-uju. Redovi se upisuju COPY-jem u zasebnu
+benchmark bazu, čija se šema svaki put pravi iznova iz sql/init.sql.
+
+Istorija se završava juče, tako da scd_benchmark.py može da odigra
+"današnji" run preko pravih upsert_ad_scd2() / mark_removed_ads().
+
+Pokretanje:
+    python benchmarks/generate_scd_history.py --years 3 --active 30000
+    python benchmarks/generate_scd_history.py --churn 0.03 --price-change 0.02
+"""
+
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scrapers'))
+from scd_utils import get_db_connection  # noqa: E402
+from normalize import parse_sobnost, parse_sprat  # noqa: E402
+
+# --- SETTINGS ---
+BENCH_DB_NAME = os.environ.get('BENCH_DB_NAME', 'real_estate_bench')
+INIT_SQL      = os.path.join(os.path.dirname(__file__), '..', 'sql', 'init.sql')
+COPY_CHUNK    = 100_000
+IZVORI        = ('nekretnine.rs', 'oglasi.rs')
+
+COLUMNS = (
+    'url', 'naslov', 'cena', 'cena_po_m2', 'lokacija', 'grad',
+    'kvadratura', 'tip_stana', 'sobnost', 'sprat', 'sobnost_num', 'sprat_num', 'izvor',
+    'kategorija', 'transakcija',
+    'valid_from', 'valid_to', 'is_current', 'version', 'change_reason'
+)
+
+# grad → (udeo oglasa, medijan €/m², lokacije)
+GRADOVI = {
+    'Beograd':    (0.50, 2600, ['Vračar', 'Novi Beograd', 'Zvezdara', 'Voždovac',
+                                'Palilula', 'Stari Grad', 'Čukarica', 'Zemun']),
+    'Novi Sad':   (0.20, 2100, ['Centar', 'Liman', 'Grbavica', 'Detelinara',
+                                'Novo Naselje', 'Podbara']),
+    'Niš':        (0.09, 1300, ['Centar', 'Medijana', 'Pantelej', 'Palilula']),
+    'Kragujevac': (0.06, 1100, ['Centar', 'Aerodrom', 'Bubanj']),
+    'Subotica':   (0.05, 1000, ['Centar', 'Prozivka', 'Kertvaroš']),
+    'Zlatibor':   (0.05, 2300, ['Centar', 'Čajetina']),
+    'Kraljevo':   (0.05,  900, ['Centar', 'Ribnica']),
+}
+# (kategorija, transakcija) → (udeo oglasa, faktor €/m² u odnosu na prodaju stanova,
+#                              log-medijan kvadrature, naslov)
+SCOPES = {
+    ('stanovi', 'prodaja'):   (0.55, 1.0,   4.05, 'Stan'),
+    ('stanovi', 'izdavanje'): (0.20, 0.005, 4.0,  'Stan'),
+    ('kuce', 'prodaja'):      (0.14, 0.8,   4.9,  'Kuća'),
+    ('kuce', 'izdavanje'):    (0.03, 0.004, 4.9,  'Kuća'),
+    ('zemljista', 'prodaja'): (0.08, 0.03,  6.9,  'Plac'),
+}
+TIPOVI_STANA = ('Garsonjera', 'Jednosoban stan', 'Dvosoban stan', 'Trosoban stan',
+                'Četvorosoban stan')
+SOBNOSTI     = ('0.5', '1.0', '1.5', '2.0', '2.5', '3.0', '3.5', '4.0', '5+')
+SPRATOVI     = ('SU', 'PR', 'VPR', '1', '2', '3', '4', '5', '6', '7', '8', 'PK')
+
+
+class HistoryGenerator:
+    """Simulira dnevne SCD promene i emituje gotove (zatvorene ili tekuće) redove."""
+
+    def __init__(self, active: int, churn: float, price_change: float, seed,
+                 first_id: int = 0):
+        self.active_target = active
+        self.churn         = churn
+        self.price_change  = price_change
+        self.rng           = random.Random(seed)
+        self._next_id      = first_id
+        self._gradovi      = list(GRADOVI)
+        self._weights      = [GRADOVI[g][0] for g in self._gradovi]
+        self._scopes       = list(SCOPES)
+        self._scope_shares = [SCOPES[scope][0] for scope in self._scopes]
+
+    def new_ad(self, izvor: str, day: date) -> dict:
+        """Novi nasumični oglas (isti oblik kao ad_normalized u scraperima)."""
+        rng  = self.rng
+        grad = rng.choices(self._gradovi, self._weights)[0]
+        kategorija, transakcija = rng.choices(self._scopes, self._scope_shares)[0]
+        _, median_m2, lokacije = GRADOVI[grad]
+        _, price_factor, log_area, label = SCOPES[kategorija, transakcija]
+        lokacija   = rng.choice(lokacije)
+        kvadratura = round(min(max(rng.lognormvariate(log_area, 0.35), 15), 20_000), 2)
+        cena_m2    = rng.lognormvariate(0, 0.25) * median_m2 * price_factor
+        self._next_id += 1
+
+        ad = {
+            'url':        f"https://www.{izvor}/oglas/{self._next_id}",
+            'naslov':     f"{label} {kvadratura:.0f} m², {grad}",
+            'cena':       round(cena_m2 * kvadratura, -2 if transakcija == 'prodaja' else -1),
+            'cena_po_m2': None,
+            'lokacija':   lokacija,
+            'grad':       grad,
+            'kvadratura': kvadratura,
+            'tip_stana':  None,
+            'sobnost':    None,
+            'sprat':      None,
+            'izvor':      izvor,
+            'kategorija': kategorija,
+            'transakcija': transakcija,
+            'valid_from': day,
+            'version':    1,
+            'change_reason': 'first_seen',
+        }
+        if izvor == 'nekretnine.rs':
+            ad['lokacija']   = f"{grad}, {lokacija}"
+            ad['cena_po_m2'] = round(ad['cena'] / kvadratura, 2)
+            if kategorija == 'stanovi':
+                ad['tip_stana'] = rng.choice(TIPOVI_STANA)
+        elif kategorija == 'stanovi':
+            ad['sobnost'] = rng.choice(SOBNOSTI)
+            ad['sprat']   = rng.choice(SPRATOVI)
+        ad['sobnost_num'] = (parse_sobnost(ad['sobnost']) if ad['sobnost']
+                             else parse_sobnost(ad['tip_stana'], allow_number=False))
+        ad['sprat_num']   = parse_sprat(ad['sprat'])
+        return ad
+
+    @staticmethod
+    def _row(ad: dict, valid_to, change_reason=None) -> tuple:
+        is_current = valid_to is None
+        return (
+            ad['url'], ad['naslov'], ad['cena'], ad['cena_po_m2'], ad['lokacija'],
+            ad['grad'], ad['kvadratura'], ad['tip_stana'], ad['sobnost'], ad['sprat'],
+            ad['sobnost_num'], ad['sprat_num'], ad['izvor'], ad['kategorija'], ad['transakcija'],
+            ad['valid_from'], valid_to, is_current, ad['version'],
+            change_reason or ad['change_reason']
+        )
+
+    def generate(self, start: date, end: date):
+        """Yield-uje redove za 'ads' od start do end (uključivo), izvor po izvor."""
+        rng = self.rng
+        for izvor in IZVORI:
+            active = [self.new_ad(izvor, start) for _ in range(self.active_target)]
+            day = start + timedelta(days=1)
+
+            while day <= end:
+                survivors = []
+                for ad in active:
+                    roll = rng.random()
+                    if roll < self.churn:
+                        # Oglas nestao → mark_removed_ads() zatvara red
+                        yield self._row(ad, day, 'removed')
+                        continue
+                    if roll < self.churn + self.price_change:
+                        # Promena cene → zatvori red + nova verzija
+                        yield self._row(ad, day)
+                        factor = rng.uniform(0.90, 0.99) if rng.random() < 0.7 \
+                            else rng.uniform(1.01, 1.08)
+                        new_cena = round(ad['cena'] * factor,
+                                         -2 if ad['transakcija'] == 'prodaja' else -1)
+                        ad = dict(ad,
+                                  cena=new_cena,
+                                  valid_from=day,
+                                  version=ad['version'] + 1,
+                                  change_reason='price_decreased' if new_cena < ad['cena']
+                                  else 'price_increased')
+                        if ad['cena_po_m2'] is not None:
+                            ad['cena_po_m2'] = round(new_cena / ad['kvadratura'], 2)
+                    survivors.append(ad)
+
+                # Novi oglasi nadoknađuju uklonjene (± šum)
+                missing = self.active_target - len(survivors)
+                new_count = max(0, missing + int(rng.gauss(0, max(1, missing) ** 0.5)))
+                survivors.extend(self.new_ad(izvor, day) for _ in range(new_count))
+
+                active = survivors
+                day += timedelta(days=1)
+
+            for ad in active:
+                yield self._row(ad, None)
+
+
+# --- DATABASE ---
+
+def ensure_database(name: str):
+    """Kreira benchmark bazu ako ne postoji (CREATE DATABASE ne ide u transakciji)."""
+    conn = get_db_connection(database='postgres')
+    conn.autocommit = True
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (name,))
+    if cursor.fetchone() is None:
+        cursor.execute(f'CREATE DATABASE "{name}"')
+        print(f"🆕 Created database {name}")
+    cursor.close()
+    conn.close()
+
+
+def copy_rows(cursor, rows) -> int:
+    """COPY-uje redove u 'ads' u paketima od COPY_CHUNK redova."""
+    sql   = f"COPY ads ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    total = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    for row in rows:
+        writer.writerow(row)
+        total += 1
+        if total % COPY_CHUNK == 0:
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            print(f"   💾 {total:,} rows")
+
+    buffer.seek(0)
+    cursor.copy_expert(sql, buffer)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic multi-year SCD history.')
+    parser.add_argument('--db', default=BENCH_DB_NAME, help='Target database (never production)')
+    parser.add_argument('--years', type=float, default=3, help='History length in years')
+    parser.add_argument('--active', type=int, default=30000,
+                        help='Active ads per izvor on any given day')
+    parser.add_argument('--churn', type=float, default=0.02,
+                        help='Daily fraction of active ads removed')
+    parser.add_argument('--price-change', type=float, default=0.01,
+                        help='Daily fraction of active ads changing price')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.db == os.environ.get('DB_NAME', 'real_estate'):
+        sys.exit(f"Refusing to overwrite {args.db} — use a separate benchmark database.")
+
+    end   = date.today() - timedelta(days=1)
+    start = end - timedelta(days=int(args.years * 365))
+    print(f"🧪 Generating SCD history {start} → {end} into {args.db}")
+    print(f"   active/izvor={args.active:,} churn={args.churn} price_change={args.price_change}")
+
+    ensure_database(args.db)
+    conn   = get_db_connection(database=args.db)
+    cursor = conn.cursor()
+    start_time = time.time()
+
+    try:
+        # Fresh schema every time: CREATE ... IF NOT EXISTS would keep indexes
+        # that were changed or removed in init.sql since the last run
+        cursor.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public;")
+        with open(INIT_SQL) as f:
+            cursor.execute(f.read())
+
+        generator = HistoryGenerator(args.active, args.churn, args.price_change, args.seed)
+        total = copy_rows(cursor, generator.generate(start, end))
+        conn.commit()
+
+        conn.autocommit = True
+        cursor.execute("VACUUM ANALYZE ads")
+        cursor.execute("SELECT pg_size_pretty(pg_total_relation_size('ads'))")
+        size = cursor.fetchone()[0]
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Generation failed: {e}")
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    print(f"\n✅ Loaded {total:,} rows ({size} incl. indexes) in {time.time() - start_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
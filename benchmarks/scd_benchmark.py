@@ -0,0 +1,270 @@
+"""
+Benchmark 'ads' šeme nad sintetičkom istorijom (generate_scd_history.py).
+
+Koraci:
+    1. Odigra jedan dnevni run po izvoru istim putem kao scraperi: sirovi
+       (string) oglasi → normalize_batch() → upsert_ads_batch() po batch-u
+       (novi / promenjena cena / nepromenjen) + mark_removed_ads() po
+       (kategorija, transakcija) scope-u.
+       Cena normalizacije se meri zasebno, po oglasu.
+    2. Meri ključne upite: v_current_ads, v_price_changes,
+       validate_scd_integrity() i inkrementalni price index.
+    3. Ispisuje veličinu tabele i indeksa.
+
+Sve se radi u jednoj transakciji koja se na kraju ROLLBACK-uje, tako da je
+benchmark ponovljiv nad istom istorijom. Poređenjem rezultata pre i posle
+izmene sql/init.sql dobijamo brojke umesto nagađanja.
+
+Pokretanje:
+    python benchmarks/scd_benchmark.py
+    python benchmarks/scd_benchmark.py --repeat 5 --explain --output bench.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scrapers'))
+from scd_utils import get_db_connection, upsert_ads_batch, mark_removed_ads  # noqa: E402
+from normalize import normalize_batch  # noqa: E402
+from price_index import update_price_index  # noqa: E402
+from generate_scd_history import BENCH_DB_NAME, IZVORI, HistoryGenerator  # noqa: E402
+
+# Upiti koje merimo: naziv → SQL
+QUERIES = {
+    'v_current_ads count':         "SELECT COUNT(*) FROM v_current_ads",
+    'v_current_ads by grad':       """
+        SELECT grad, COUNT(*), PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY cena)
+        FROM v_current_ads GROUP BY grad
+    """,
+    'v_price_changes count':       "SELECT COUNT(*) FROM v_price_changes",
+    'v_price_changes last 30d':    """
+        SELECT grad, AVG(price_change_pct), COUNT(*)
+        FROM v_price_changes
+        WHERE change_date >= CURRENT_DATE - 30
+        GROUP BY grad
+    """,
+    'validate_scd_integrity()':    "SELECT * FROM validate_scd_integrity()",
+}
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    result  = func(*args)
+    return time.perf_counter() - started, result
+
+
+def _sr_number(value) -> str:
+    """132600.0 → '132.600,00' (format sa sajtova)"""
+    return f"{float(value):,.2f}".replace(',', ' ').replace('.', ',').replace(' ', '.')
+
+
+def _raw_record(ad: dict) -> dict:
+    """Vraća normalizovan oglas u sirov oblik koji daje parse_html_page()."""
+    cena       = f"{_sr_number(ad['cena'])} €" if ad['cena'] is not None else 'N/A'
+    kvadratura = f"{_sr_number(ad['kvadratura'])} m²" if ad['kvadratura'] is not None else 'N/A'
+
+    if ad['izvor'] == 'nekretnine.rs':
+        cena_po_m2 = 'N/A'
+        if ad['cena_po_m2'] is not None:
+            cena_po_m2 = f"{_sr_number(ad['cena_po_m2'])} €/m²"
+        return {'Naslov': ad['naslov'], 'Cena': cena, 'Cena_po_m2': cena_po_m2,
+                'Lokacija': ad['lokacija'], 'Kvadratura': kvadratura,
+                'Tip_stana': ad['tip_stana'], 'Datum_oglasa': 'N/A', 'URL': ad['url']}
+
+    return {'Naslov': ad['naslov'], 'Cena': cena, 'Grad': ad['grad'],
+            'Lokacija': ad['lokacija'], 'Kvadratura': kvadratura,
+            'Sobnost': ad['sobnost'], 'Sprat': ad['sprat'], 'Link': ad['url']}
+
+
+def build_day_load(cursor, izvor: str, churn: float, price_change: float,
+                   rng: random.Random) -> dict:
+    """
+    Pravi "današnji" scrape za izvor iz trenutno aktivnih oglasa:
+    churn deo nestaje, price_change deo menja cenu, ostali su nepromenjeni,
+    a novi oglasi nadoknađuju nestale. Vraća sirove (string) zapise po
+    scope-u, kao što ih scraperi dobijaju po work unit-u.
+    """
+    cursor.execute("""
+        SELECT url, naslov, cena, cena_po_m2, lokacija, grad,
+               kvadratura, tip_stana, sobnost, sprat, kategorija, transakcija
+        FROM ads
+        WHERE izvor = %s AND is_current = TRUE
+    """, (izvor,))
+    columns = [d[0] for d in cursor.description]
+
+    ads = []
+    removed = 0
+    for row in cursor.fetchall():
+        ad = dict(zip(columns, row), izvor=izvor)
+        roll = rng.random()
+        if roll < churn:
+            removed += 1
+            continue
+        if roll < churn + price_change and ad['cena'] is not None:
+            ad['cena'] = round(float(ad['cena']) * rng.uniform(0.90, 1.05),
+                               -2 if ad['transakcija'] == 'prodaja' else -1)
+        ads.append(ad)
+
+    # first_id daleko iznad istorije → URL-ovi koji sigurno nisu u bazi
+    generator = HistoryGenerator(0, 0, 0, rng.random(), first_id=10 ** 9)
+    ads.extend(generator.new_ad(izvor, date.today()) for _ in range(removed))
+    rng.shuffle(ads)
+
+    by_scope = {}
+    for ad in ads:
+        by_scope.setdefault((ad['kategorija'], ad['transakcija']), []).append(_raw_record(ad))
+    return by_scope
+
+
+def replay_day(cursor, churn: float, price_change: float, seed: int,
+               batch_size: int) -> dict:
+    """Odigra dnevni normalize + upsert/removal load za oba izvora i vraća merenja."""
+    rng = random.Random(seed)
+    results = {}
+
+    for izvor in IZVORI:
+        by_scope = build_day_load(cursor, izvor, churn, price_change, rng)
+        stats = {'inserted': 0, 'changed': 0, 'unchanged': 0}
+        scraped_urls = []   # svi URL-ovi izvora, kao u scraperima
+        normalize_time = upsert_time = removal_time = 0.0
+        removed = 0
+
+        for (kategorija, transakcija), raw_ads in by_scope.items():
+            for i in range(0, len(raw_ads), batch_size):
+                elapsed, batch = _timed(normalize_batch, raw_ads[i:i + batch_size], izvor,
+                                        kategorija, transakcija)
+                normalize_time += elapsed
+
+                elapsed, batch_stats = _timed(upsert_ads_batch, cursor, batch)
+                upsert_time += elapsed
+                for result, count in batch_stats.items():
+                    stats[result] += count
+                scraped_urls.extend(batch['url'])
+
+        # Removal po scope-u, kao posle run_units() u scraperima
+        for kategorija, transakcija in by_scope:
+            elapsed, scope_removed = _timed(mark_removed_ads, cursor, scraped_urls, izvor,
+                                            kategorija, transakcija)
+            removal_time += elapsed
+            removed += scope_removed
+
+        total_ads = sum(len(raw_ads) for raw_ads in by_scope.values())
+        count = max(total_ads, 1)
+        results[izvor] = {
+            'ads':             total_ads,
+            'scopes':          len(by_scope),
+            'normalize_s':     round(normalize_time, 3),
+            'normalize_us_ad': round(normalize_time / count * 1e6, 2),
+            'upsert_s':        round(upsert_time, 3),
+            'upsert_ms_ad':    round(upsert_time / count * 1000, 3),
+            'removal_s':       round(removal_time, 3),
+            'removed':         removed,
+            **stats,
+        }
+        print(f"   🔁 {izvor}: {total_ads:,} ads in {len(by_scope)} scopes, "
+              f"normalize {normalize_time:.2f}s ({results[izvor]['normalize_us_ad']} µs/ad), "
+              f"upsert {upsert_time:.2f}s ({results[izvor]['upsert_ms_ad']} ms/ad), "
+              f"removal {removal_time:.2f}s → {stats}, removed={removed}")
+    return results
+
+
+def time_queries(cursor, repeat: int, explain: bool) -> dict:
+    """Meri svaki upit 'repeat' puta; vraća min i medijan u sekundama."""
+    results = {}
+    for name, sql in QUERIES.items():
+        timings = []
+        for _ in range(repeat):
+            elapsed, _ = _timed(lambda: (cursor.execute(sql), cursor.fetchall()))
+            timings.append(elapsed)
+        results[name] = {'min_s': round(min(timings), 4),
+                         'median_s': round(statistics.median(timings), 4)}
+        print(f"   ⏱️  {name:<28} min {min(timings):8.4f}s  "
+              f"median {statistics.median(timings):8.4f}s")
+
+        if explain:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")
+            print('\n'.join(f"        {line}" for (line,) in cursor.fetchall()))
+    return results
+
+
+def table_sizes(cursor) -> dict:
+    cursor.execute("""
+        SELECT 'ads (total)', pg_total_relation_size('ads')
+        UNION ALL
+        SELECT indexrelname, pg_relation_size(indexrelid)
+        FROM pg_stat_user_indexes
+        WHERE relname = 'ads'
+    """)
+    sizes = dict(cursor.fetchall())
+    for name, size in sizes.items():
+        print(f"   📦 {name:<32} {size / 1024 ** 2:10.1f} MB")
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ads schema on synthetic SCD history.')
+    parser.add_argument('--db', default=BENCH_DB_NAME)
+    parser.add_argument('--churn', type=float, default=0.02)
+    parser.add_argument('--price-change', type=float, default=0.01)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per query')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Ads per normalize/upsert batch during replay')
+    parser.add_argument('--explain', action='store_true', help='Print EXPLAIN ANALYZE plans')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    conn   = get_db_connection(database=args.db)
+    cursor = conn.cursor()
+    report = {'db': args.db, 'date': date.today().isoformat()}
+
+    try:
+        cursor.execute("SELECT COUNT(*), COUNT(*) FILTER (WHERE is_current) FROM ads")
+        total_rows, current_rows = cursor.fetchone()
+        report['rows'] = {'total': total_rows, 'current': current_rows}
+        print(f"🧪 {args.db}: {total_rows:,} rows, {current_rows:,} current")
+
+        print("\n--- Queries before today's load ---")
+        report['queries_before'] = time_queries(cursor, args.repeat, args.explain)
+
+        print("\n--- Replaying today's load ---")
+        report['replay'] = replay_day(cursor, args.churn, args.price_change, args.seed,
+                                      args.batch_size)
+
+        print("\n--- Queries after today's load ---")
+        report['queries_after'] = time_queries(cursor, args.repeat, args.explain)
+
+        print("\n--- Price index ---")
+        report['price_index'] = {}
+        cursor.execute("SELECT COUNT(*) FROM price_index_state")
+        if cursor.fetchone()[0] == 0:
+            # Bez stanja: bootstrap za juče, pa je današnji run inkrementalan
+            elapsed, written = _timed(update_price_index, cursor,
+                                      date.today() - timedelta(days=1))
+            report['price_index']['bootstrap'] = {'seconds': round(elapsed, 3), 'rows': written}
+            print(f"   📦 bootstrap: {elapsed:.2f}s, {written} rows")
+        elapsed, written = _timed(update_price_index, cursor, date.today())
+        report['price_index']['incremental'] = {'seconds': round(elapsed, 3), 'rows': written}
+        print(f"   📈 incremental: {elapsed:.2f}s, {written} rows")
+
+        print("\n--- Sizes ---")
+        report['sizes_bytes'] = table_sizes(cursor)
+    finally:
+        conn.rollback()   # benchmark ne menja istoriju
+        cursor.close()
+        conn.close()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Zajednički scheduler za crawl po kategorijama (nekretnine.rs i oglasi.rs).
+
+Crawl je skup work unit-a: kategorija × transakcija × deo, gde je deo
+opseg cena (nekretnine.rs) ili batch strana (oglasi.rs). Umesto da se
+kategorije i opsezi obrađuju jedan po jedan, fiksan broj worker-a uzima
+unit-e iz zajedničkog reda, a svi dele isti semaphore za HTTP zahteve.
+Tako je concurrency budžet stalno popunjen, pa 5x više kategorija ne
+znači 5x duži run.
+
+Unit-i su poređani round-robin po (kategorija, transakcija), da nijedna
+kategorija ne čeka da se druga završi.
+"""
+
+import asyncio
+from itertools import zip_longest
+from typing import NamedTuple
+
+KATEGORIJE  = ('stanovi', 'kuce', 'zemljista')
+TRANSAKCIJE = ('prodaja', 'izdavanje')
+
+
+class CrawlUnit(NamedTuple):
+    """Jedan nezavisan deo crawl-a."""
+    kategorija:  str
+    transakcija: str
+    part:        tuple   # (min_price, max_price) ili (first_page, last_page)
+
+    @property
+    def scope(self) -> tuple:
+        """Opseg za detekciju uklonjenih oglasa: (kategorija, transakcija)."""
+        return self.kategorija, self.transakcija
+
+    def __str__(self):
+        return f"{self.kategorija}/{self.transakcija} {self.part[0]:,}-{self.part[1]:,}"
+
+
+def add_crawl_arguments(parser, supported: dict):
+    """Dodaje --kategorije / --transakcije (podrazumevano sve što sajt podržava)."""
+    parser.add_argument('--kategorije', nargs='+', choices=KATEGORIJE,
+                        default=sorted({k for k, _ in supported}),
+                        help='Categories to crawl')
+    parser.add_argument('--transakcije', nargs='+', choices=TRANSAKCIJE,
+                        default=sorted({t for _, t in supported}),
+                        help='Transaction types to crawl')
+
+
+def select_scopes(supported: dict, kategorije, transakcije) -> list:
+    """Kombinacije kategorija × transakcija koje su tražene i koje sajt ima."""
+    return [(k, t) for k, t in supported if k in kategorije and t in transakcije]
+
+
+def build_units(scopes: list, parts_for) -> list:
+    """
+    Pravi work unit-e za sve scope-ove, poređane round-robin.
+
+    Args:
+        scopes: lista (kategorija, transakcija)
+        parts_for: funkcija (kategorija, transakcija) → lista delova
+    """
+    per_scope = [[CrawlUnit(k, t, part) for part in parts_for(k, t)] for k, t in scopes]
+    return [unit for group in zip_longest(*per_scope) for unit in group if unit is not None]
+
+
+async def run_units(units: list, process_unit, workers: int) -> dict:
+    """
+    Obrađuje unit-e sa 'workers' paralelnih worker-a.
+
+    Worker-i dele jednu DB konekciju, pa ako jedan unit pukne, ostali se
+    otkazuju i čekaju pre nego što greška stigne do main() — niko ne može
+    da commit-uje posle greške, pre rollback-a. (gather umesto TaskGroup:
+    Airflow image pokreće scrapere na Python 3.8.)
+
+    Args:
+        units: lista CrawlUnit
+        process_unit: async funkcija(unit) → broj obrađenih oglasa
+        workers: koliko unit-a je istovremeno aktivno
+
+    Returns:
+        dict scope → ukupan broj oglasa
+    """
+    queue = asyncio.Queue()
+    for unit in units:
+        queue.put_nowait(unit)
+
+    totals = {unit.scope: 0 for unit in units}
+
+    async def worker():
+        while not queue.empty():
+            unit = queue.get_nowait()
+            totals[unit.scope] += await process_unit(unit)
+
+    tasks = [asyncio.ensure_future(worker()) for _ in range(min(workers, len(units)))]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return totals
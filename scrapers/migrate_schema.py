@@ -0,0 +1,78 @@
+"""
+Dovodi postojeću bazu na trenutnu šemu.
+
+sql/init.sql se izvršava automatski samo kada se postgres_data volume
+kreira prvi put, pa postojeće instalacije ne bi dobile nove kolone,
+indekse i view-ove. Ovaj skript (prvi task u DAG-u):
+    1. ponovo primenjuje sql/init.sql — sve je IF NOT EXISTS /
+       CREATE OR REPLACE, pa je bezbedno na svakom run-u
+    2. izvršava sql/migrations/*.sql koji još nisu primenjeni
+       (backfill podataka), po imenu fajla, svaki tačno jednom
+
+Pokretanje:
+    python migrate_schema.py
+"""
+
+import os
+
+from scd_utils import get_db_connection
+
+# --- SETTINGS ---
+SQL_DIR        = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sql')
+INIT_SQL       = os.path.join(SQL_DIR, 'init.sql')
+MIGRATIONS_DIR = os.path.join(SQL_DIR, 'migrations')
+
+
+def pending_migrations(cursor) -> list:
+    """Imena fajlova iz MIGRATIONS_DIR koji nisu u schema_migrations, po redu."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name       TEXT PRIMARY KEY,
+            applied_at TIMESTAMP DEFAULT NOW()
+        )
+    """)
+    cursor.execute("SELECT name FROM schema_migrations")
+    applied = {name for (name,) in cursor.fetchall()}
+    return sorted(name for name in os.listdir(MIGRATIONS_DIR)
+                  if name.endswith('.sql') and name not in applied)
+
+
+def migrate(cursor) -> list:
+    """
+    Primenjuje init.sql i nove migracije.
+
+    Returns:
+        Lista primenjenih migracija
+    """
+    with open(INIT_SQL) as f:
+        cursor.execute(f.read())
+
+    applied = []
+    for name in pending_migrations(cursor):
+        with open(os.path.join(MIGRATIONS_DIR, name)) as f:
+            cursor.execute(f.read())
+        cursor.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (name,))
+        applied.append(name)
+        print(f"   🔧 {name}")
+    return applied
+
+
+def main():
+    conn   = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        applied = migrate(cursor)
+        conn.commit()
+        print(f"✅ Schema up to date ({len(applied)} new migrations)")
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Schema migration failed: {e}")
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,23 @@
+import argparse
 import asyncio
 import aiohttp
 from bs4 import BeautifulSoup
 import time
 import re
-from scd_utils import get_db_connection, upsert_ad_scd2, mark_removed_ads
+from scd_utils import get_db_connection, upsert_ads_batch, mark_removed_ads
+from normalize import normalize_batch
+from crawl_scheduler import add_crawl_arguments, select_scopes, build_units, run_units
+import profiling
 
 # --- SETTINGS ---
 MAX_CONCURRENT_REQUESTS = 5
+MAX_PARALLEL_UNITS = 5       # work units crawled at once (each fetches one page at a time)
 RETRY_COUNT = 3
 RETRY_DELAY = 5
 IZVOR = 'nekretnine.rs'
 
 # Price ranges to cover all listings (site limits results per search)
-PRICE_RANGES = [
+SALE_PRICE_RANGES = [
     (0, 50000),
     (50000, 75000),
     (75000, 100000),
@@ -35,42 +40,37 @@ PRICE_RANGES = [
     (500000, 9999999)
 ]
 
-BASE_URL = "https://www.nekretnine.rs/stambeni-objekti/izdavanje-prodaja/prodaja/cena/{min_price}_{max_price}/lista/po-stranici/20/stranica/{page}/"
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-}
-
-
-# --- DATA NORMALIZATION ---
-# HTML scraper returns everything as strings, PostgreSQL expects NUMERIC types
-
-def _parse_price(price_str: str):
-    """'123.456 €' → 123456.0"""
-    if not price_str or price_str == 'N/A':
-        return None
-    try:
-        cleaned = re.sub(r'[^\d,.]', '', price_str).replace('.', '').replace(',', '.')
-        return float(cleaned)
-    except (ValueError, AttributeError):
-        return None
-
+# Rentals are monthly prices
+RENT_PRICE_RANGES = [
+    (0, 300),
+    (300, 400),
+    (400, 500),
+    (500, 600),
+    (600, 800),
+    (800, 1000),
+    (1000, 1500),
+    (1500, 9999999)
+]
 
-def _parse_area(area_str: str):
-    """'75 m²' → 75.0"""
-    if not area_str or area_str == 'N/A':
-        return None
-    try:
-        match = re.search(r'[\d,.]+', area_str)
-        return float(match.group().replace(',', '.')) if match else None
-    except (ValueError, AttributeError):
-        return None
+PRICE_RANGES = {
+    'prodaja':   SALE_PRICE_RANGES,
+    'izdavanje': RENT_PRICE_RANGES,
+}
 
+# (kategorija, transakcija) → URL segments
+CATEGORIES = {
+    ('stanovi', 'prodaja'):     ('stambeni-objekti/stanovi', 'prodaja'),
+    ('stanovi', 'izdavanje'):   ('stambeni-objekti/stanovi', 'izdavanje'),
+    ('kuce', 'prodaja'):        ('stambeni-objekti/kuce', 'prodaja'),
+    ('kuce', 'izdavanje'):      ('stambeni-objekti/kuce', 'izdavanje'),
+    ('zemljista', 'prodaja'):   ('zemljista', 'prodaja'),
+}
 
-def _extract_grad(lokacija: str):
-    """'Beograd, Novi Beograd, Blok 45' → 'Beograd'"""
-    if not lokacija or lokacija == 'N/A':
-        return None
-    return lokacija.split(',')[0].strip()
+BASE_URL = "https://www.nekretnine.rs/{kategorija}/izdavanje-prodaja/{transakcija}/cena/{min_price}_{max_price}/lista/po-stranici/20/stranica/{page}/"
+OFFER_URL_PATTERN = re.compile(r'/(stambeni-objekti|zemljista)/')
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
 
 
 # --- HTML PARSING ---
@@ -85,7 +85,7 @@ def parse_html_page(html_content):
 
     for oglas in oglasi:
         try:
-            url_tag = oglas.find('a', href=re.compile(r'/stambeni-objekti/'))
+            url_tag = oglas.find('a', href=OFFER_URL_PATTERN)
             url = "https://www.nekretnine.rs" + url_tag['href'] if url_tag else 'N/A'
 
             naslov_tag = oglas.find('h2', class_='offer-title')
@@ -171,81 +171,63 @@ async def fetch_page(session, url, semaphore):
 
 # --- SCRAPING + SCD UPSERT ---
 
-async def process_price_range(session, semaphore, min_price, max_price,
-                               cursor, scraped_urls: list):
+async def process_unit(session, semaphore, unit, cursor, conn, scraped_urls: list):
     """
-    Scrapes all pages for one price range.
-    For each ad: normalizes data, calls SCD Type 2 upsert, tracks URL.
+    Scrapes all pages for one work unit (kategorija × transakcija × price range).
+    For each page: batch-normalizes ads, runs batch SCD Type 2 upsert, tracks URLs.
     """
-    print(f"\n{'=' * 60}")
-    print(f"💰 Price range: {min_price:,} - {max_price:,} €")
-    print(f"{'=' * 60}")
+    min_price, max_price = unit.part
+    kategorija_segment, transakcija_segment = CATEGORIES[unit.scope]
+    print(f"\n💰 Starting {unit} €")
 
     total_ads_in_range = 0
     stats = {'inserted': 0, 'changed': 0, 'unchanged': 0}
     page = 1
 
     while True:
-        print(f"\n--- Page {page} ({min_price:,}-{max_price:,} €) ---")
-
-        url = BASE_URL.format(min_price=min_price, max_price=max_price, page=page)
+        url = BASE_URL.format(kategorija=kategorija_segment, transakcija=transakcija_segment,
+                              min_price=min_price, max_price=max_price, page=page)
         html = await fetch_page(session, url, semaphore)
 
         if not html:
-            print(f"   ⚠️  Could not fetch page {page}. Stopping this range.")
+            print(f"   ⚠️  [{unit}] Could not fetch page {page}. Stopping this unit.")
             break
 
         ads_data = parse_html_page(html)
 
         if not ads_data:
-            print(f"   🛑 No ads on page {page}. End of range.")
+            print(f"   🛑 [{unit}] No ads on page {page}. End of range.")
             break
 
-        print(f"   ✅ Found {len(ads_data)} ads on page {page}.")
-
-        # Normalize each ad and run SCD Type 2 upsert
-        for ad in ads_data:
-            ad_normalized = {
-                'url':        ad['URL'],
-                'naslov':     ad['Naslov'],
-                'cena':       _parse_price(ad['Cena']),
-                'cena_po_m2': _parse_price(ad['Cena_po_m2']),
-                'lokacija':   ad['Lokacija'],
-                'grad':       _extract_grad(ad['Lokacija']),
-                'kvadratura': _parse_area(ad['Kvadratura']),
-                'tip_stana':  ad['Tip_stana'],
-                'sobnost':    None,  # not available on nekretnine.rs
-                'sprat':      None,  # not available on nekretnine.rs
-                'izvor':      IZVOR
-            }
-
-            result = upsert_ad_scd2(cursor, ad_normalized)
-            stats[result] += 1
-
-            if ad_normalized['url'] != 'N/A':
-                scraped_urls.append(ad_normalized['url'])
+        # Normalize the whole page and run batch SCD Type 2 upsert
+        batch = normalize_batch(ads_data, IZVOR, *unit.scope)
+        for result, count in upsert_ads_batch(cursor, batch).items():
+            stats[result] += count
+        scraped_urls.extend(batch['url'])
 
         total_ads_in_range += len(ads_data)
-        print(f"   📊 Page stats: {stats}")
+        print(f"   ✅ [{unit}] Page {page}: {len(ads_data)} ads | stats: {stats}")
 
         page += 1
         await asyncio.sleep(0.5)
 
-    print(f"\n✅ Range {min_price:,}-{max_price:,} € done. Total: {total_ads_in_range} ads.")
+    conn.commit()  # also commits finished pages of other in-flight units
+    print(f"💾 [{unit}] done and committed. Total: {total_ads_in_range} ads.")
     return total_ads_in_range
 
 
 # --- MAIN ---
 
-async def main():
+async def main(scopes: list):
     start_time = time.time()
 
+    units = build_units(scopes, lambda kategorija, transakcija: PRICE_RANGES[transakcija])
+
     print(f"🚀 Starting nekretnine.rs scraper")
-    print(f"📊 Price ranges: {len(PRICE_RANGES)}")
+    print(f"📊 Categories: {scopes} | work units: {len(units)}")
 
-    semaphore            = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
-    scraped_urls         = []  # collects all seen URLs for removed ad detection
-    total_ads_all_ranges = 0   # running total across all price ranges
+    semaphore    = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    scraped_urls = []  # all URLs seen this run, for removed ad detection
 
     # Single PostgreSQL connection for the entire run
     conn   = get_db_connection()
@@ -253,19 +235,22 @@ async def main():
 
     try:
         async with aiohttp.ClientSession(headers=HEADERS) as session:
-            for min_price, max_price in PRICE_RANGES:
-                ads_count = await process_price_range(
-                    session, semaphore, min_price, max_price,
-                    cursor, scraped_urls
-                )
-                total_ads_all_ranges += ads_count
-                conn.commit()  # commit after each price range
-                print(f"💾 Committed range {min_price:,}-{max_price:,} €")
-
-        # Mark ads not seen today as removed (SCD Type 2 close)
-        removed = mark_removed_ads(cursor, scraped_urls, IZVOR)
-        conn.commit()
-        print(f"🗑️  Marked {removed} ads as removed")
+            totals = await run_units(
+                units,
+                lambda unit: process_unit(session, semaphore, unit, cursor, conn, scraped_urls),
+                MAX_PARALLEL_UNITS
+            )
+
+        # Mark ads not seen today as removed, per category (SCD Type 2 close).
+        # URLs seen in any category count as seen, so a listing that moved
+        # between categories is not closed by its old category.
+        for kategorija, transakcija in scopes:
+            if not totals.get((kategorija, transakcija)):
+                print(f"⚠️  {kategorija}/{transakcija}: no ads scraped, skipping removal")
+                continue
+            removed = mark_removed_ads(cursor, scraped_urls, IZVOR, kategorija, transakcija)
+            conn.commit()
+            print(f"🗑️  {kategorija}/{transakcija}: marked {removed} ads as removed")
 
     except Exception as e:
         conn.rollback()  # undo uncommitted changes on error
@@ -278,9 +263,18 @@ async def main():
     print("\n" + "=" * 60)
     print("🏁 SCRAPING COMPLETE")
     print("=" * 60)
-    print(f"\n🗃️  Total ads processed: {total_ads_all_ranges}")
+    for (kategorija, transakcija), total in totals.items():
+        print(f"   {kategorija}/{transakcija}: {total} ads")
+    print(f"\n🗃️  Total ads processed: {sum(totals.values())}")
     print(f"⏱️  Total time: {time.time() - start_time:.2f}s")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=f'Scrape {IZVOR} listings.')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profile the run (cProfile + flamegraph samples + slow callbacks)')
+    add_crawl_arguments(parser, CATEGORIES)
+    args = parser.parse_args()
+
+    scopes = select_scopes(CATEGORIES, args.kategorije, args.transakcije)
+    profiling.run(main(scopes), name=IZVOR, enabled=args.profile)
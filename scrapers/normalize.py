@@ -0,0 +1,218 @@
+"""
+Batch normalizacija sirovih oglasa za Real Estate Serbia scrapere.
+
+HTML parser vraća sve kao stringove; ovde cela strana (ili batch) postaje
+tipizovane kolone u jednom pozivu, spremne za COPY loader
+(scd_utils.upsert_ads_batch). Svi regex-i su prekompajlirani jednom,
+a čišćenje cene je jedan str.translate umesto niza replace() poziva.
+
+Pored toga sobnost/sprat se standardizuju u brojeve:
+    'Dvoiposoban' / '2.5'   → sobnost_num = 2.5
+    'Prizemlje' / 'PR'      → sprat_num   = 0
+    '3. sprat' / '3/5'      → sprat_num   = 3
+Vrednosti van razumnog opsega (*_RANGE) postaju None,
+da jedan čudan oglas ne obori COPY cele strane.
+"""
+
+import re
+
+# --- PATTERNS ---
+_NON_PRICE_CHARS = re.compile(r'[^\d,.]')
+_NUMBER          = re.compile(r'[\d,.]+')
+_INTEGER         = re.compile(r'-?\d+')
+# '1.200' / '12.500,5' — tačka kao separator hiljada (grupe od tri cifre)
+_THOUSANDS       = re.compile(r'\d{1,3}(\.\d{3})+(,\d+)?')
+# '123.456,78' → '123456.78': tačka je separator hiljada, zarez decimalni
+_PRICE_TABLE     = str.maketrans({'.': None, ',': '.'})
+
+MISSING = (None, '', 'N/A')
+
+PRICE_RANGE   = (0, 10 ** 9)          # cena, cena_po_m2 (€)
+AREA_RANGE    = (0, 999_999.99)       # kvadratura NUMERIC(8, 2); zemljišta su i > 1000 m²
+SOBNOST_RANGE = (0, 20)
+SPRAT_RANGE   = (-3, 100)
+
+# Tekstualni opisi sobnosti (oglasi.rs 'Sobnost', nekretnine.rs 'Tip_stana')
+_SOBNOST_WORDS = (
+    ('garsonjera', 0.5),
+    ('jednoiposob', 1.5),
+    ('dvoiposob', 2.5),
+    ('troiposob', 3.5),
+    ('četvoroiposob', 4.5),
+    ('cetvoroiposob', 4.5),
+    ('jednosob', 1.0),
+    ('dvosob', 2.0),
+    ('trosob', 3.0),
+    ('četvorosob', 4.0),
+    ('cetvorosob', 4.0),
+    ('petosob', 5.0),
+)
+
+# Nivoi bez broja sprata
+_SPRAT_WORDS = {
+    'su': -1, 'suteren': -1,
+    'pr': 0, 'prizemlje': 0,
+    'vpr': 0, 'visoko prizemlje': 0,
+}
+_POTKROVLJE = ('pk', 'potkrovlje')
+
+# Kolone koje vraća normalize_batch(), redosled kao u 'ads'
+COLUMNS = (
+    'url', 'naslov', 'cena', 'cena_po_m2', 'lokacija', 'grad', 'kvadratura',
+    'tip_stana', 'sobnost', 'sprat', 'sobnost_num', 'sprat_num', 'izvor',
+    'kategorija', 'transakcija'
+)
+
+# Ključevi sirovog dict-a po izvoru (parse_html_page() iz svakog scrapera)
+_RAW_FIELDS = {
+    'nekretnine.rs': {'url': 'URL', 'naslov': 'Naslov', 'cena': 'Cena',
+                      'cena_po_m2': 'Cena_po_m2', 'lokacija': 'Lokacija',
+                      'kvadratura': 'Kvadratura', 'tip_stana': 'Tip_stana'},
+    'oglasi.rs':     {'url': 'Link', 'naslov': 'Naslov', 'cena': 'Cena',
+                      'lokacija': 'Lokacija', 'grad': 'Grad', 'kvadratura': 'Kvadratura',
+                      'sobnost': 'Sobnost', 'sprat': 'Sprat'},
+}
+
+
+# --- SCALAR PARSERS ---
+
+def _in_range(value, bounds):
+    low, high = bounds
+    return value if value is not None and low <= value <= high else None
+
+
+def parse_price(price_str: str):
+    """'123.456 €' → 123456.0"""
+    if price_str in MISSING:
+        return None
+    try:
+        price = float(_NON_PRICE_CHARS.sub('', price_str).translate(_PRICE_TABLE))
+    except ValueError:
+        return None
+    return _in_range(price, PRICE_RANGE)
+
+
+def parse_area(area_str: str):
+    """'75 m²' / '75,5 m²' → 75.0 / 75.5, '1.200 m²' → 1200.0 (kao parse_price)"""
+    if area_str in MISSING:
+        return None
+    match = _NUMBER.search(area_str)
+    if not match:
+        return None
+    number = match.group()
+    if _THOUSANDS.fullmatch(number):
+        number = number.translate(_PRICE_TABLE)
+    else:
+        number = number.replace(',', '.')
+    try:
+        return _in_range(float(number), AREA_RANGE)
+    except ValueError:
+        return None
+
+
+def extract_grad(lokacija: str):
+    """'Beograd, Novi Beograd, Blok 45' → 'Beograd'"""
+    if lokacija in MISSING:
+        return None
+    return lokacija.split(',', 1)[0].strip()
+
+
+def parse_sobnost(sobnost_str: str, allow_number: bool = True):
+    """
+    '2.5' / '5+' / 'Dvoiposoban' / 'Garsonjera' → broj soba (float)
+
+    Args:
+        allow_number: False za slobodan tekst (nekretnine.rs 'Tip_stana'),
+            gde broj nije broj soba ('Stan u zgradi 1970') — tada samo reči
+    """
+    if sobnost_str in MISSING:
+        return None
+    if allow_number:
+        match = _NUMBER.search(sobnost_str)
+        if match:
+            try:
+                return _in_range(float(match.group().replace(',', '.')), SOBNOST_RANGE)
+            except ValueError:
+                pass
+    lowered = sobnost_str.lower()
+    for word, value in _SOBNOST_WORDS:
+        if word in lowered:
+            return value
+    return None
+
+
+def parse_sprat(sprat_str: str):
+    """
+    '3. sprat' / '3/5' → 3, 'PR' / 'PR/4' → 0, 'SU/5' → -1
+
+    Potkrovlje je iznad poslednjeg sprata: 'PK/4' → 5, a bez ukupnog
+    broja spratova ('PK', 'Potkrovlje') ostaje None.
+    """
+    if sprat_str in MISSING:
+        return None
+    level, _, total = (part.strip().lower() for part in sprat_str.partition('/'))
+
+    if level in _SPRAT_WORDS:
+        return _SPRAT_WORDS[level]
+    if level in _POTKROVLJE:
+        match = _INTEGER.search(total)
+        return _in_range(int(match.group()) + 1, SPRAT_RANGE) if match else None
+
+    match = _INTEGER.search(level)
+    return _in_range(int(match.group()), SPRAT_RANGE) if match else None
+
+
+# --- BATCH ---
+
+def normalize_batch(raw_ads: list, izvor: str, kategorija: str = None,
+                    transakcija: str = None) -> dict:
+    """
+    Normalizuje celu stranu/batch sirovih oglasa jednog izvora.
+
+    Oglasi bez URL-a (poslovni ključ) se preskaču.
+
+    Args:
+        kategorija, transakcija: crawl dimenzije batch-a ('stanovi', 'prodaja'...)
+
+    Returns:
+        dict kolona → lista vrednosti (ključevi iz COLUMNS), sve iste dužine
+    """
+    fields = _RAW_FIELDS[izvor]
+    raw    = [ad for ad in raw_ads if ad.get(fields['url']) not in MISSING]
+
+    def column(name):
+        # 'N/A' i prazni stringovi iz parsera → NULL, i za tekstualne kolone
+        key = fields.get(name)
+        if not key:
+            return [None] * len(raw)
+        return [None if ad.get(key) in MISSING else ad.get(key) for ad in raw]
+
+    lokacija  = column('lokacija')
+    sobnost   = column('sobnost')
+    tip_stana = column('tip_stana')
+
+    if 'grad' in fields:
+        grad = column('grad')       # oglasi.rs daje grad direktno
+    else:
+        grad = [extract_grad(value) for value in lokacija]
+
+    return {
+        'url':         column('url'),
+        'naslov':      column('naslov'),
+        'cena':        [parse_price(value) for value in column('cena')],
+        'cena_po_m2':  [parse_price(value) for value in column('cena_po_m2')],
+        'lokacija':    lokacija,
+        'grad':        grad,
+        'kvadratura':  [parse_area(value) for value in column('kvadratura')],
+        'tip_stana':   tip_stana,
+        'sobnost':     sobnost,
+        'sprat':       column('sprat'),
+        # nekretnine.rs nema sobnost, ali je tip stana ('Dvosoban stan') nosi
+        'sobnost_num': [parse_sobnost(s) if s is not None
+                        else parse_sobnost(t, allow_number=False)
+                        for s, t in zip(sobnost, tip_stana)],
+        'sprat_num':   [parse_sprat(value) for value in column('sprat')],
+        'izvor':       [izvor] * len(raw),
+        'kategorija':  [kategorija] * len(raw),
+        'transakcija': [transakcija] * len(raw),
+    }
@@ -1,50 +1,38 @@
+import argparse
 import asyncio
 import aiohttp
 from bs4 import BeautifulSoup
 import time
-import re
-from scd_utils import get_db_connection, upsert_ad_scd2, mark_removed_ads
+from scd_utils import get_db_connection, upsert_ads_batch, mark_removed_ads
+from normalize import normalize_batch
+from crawl_scheduler import add_crawl_arguments, select_scopes, build_units, run_units
+import profiling
 
 # --- SETTINGS ---
 START_PAGE = 1
 END_PAGE = 10
 BATCH_SIZE = 100
 MAX_CONCURRENT_REQUESTS = 5
+MAX_PARALLEL_UNITS = 2       # work units crawled at once (each fetches its pages concurrently)
 RETRY_COUNT = 3
 RETRY_DELAY = 5
 IZVOR = 'oglasi.rs'
 
-BASE_URL = "https://www.oglasi.rs/nekretnine/prodaja-stanova?p={}"
+# (kategorija, transakcija) → URL segment
+CATEGORIES = {
+    ('stanovi', 'prodaja'):     'prodaja-stanova',
+    ('stanovi', 'izdavanje'):   'izdavanje-stanova',
+    ('kuce', 'prodaja'):        'prodaja-kuca',
+    ('kuce', 'izdavanje'):      'izdavanje-kuca',
+    ('zemljista', 'prodaja'):   'prodaja-placeva',
+}
+
+BASE_URL = "https://www.oglasi.rs/nekretnine/{kategorija}?p={page}"
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
 
 
-# --- DATA NORMALIZATION ---
-# HTML scraper returns everything as strings, PostgreSQL expects NUMERIC types
-
-def _parse_price(price_str: str):
-    """'123.456 €' → 123456.0"""
-    if not price_str or price_str == 'N/A':
-        return None
-    try:
-        cleaned = re.sub(r'[^\d,.]', '', price_str).replace('.', '').replace(',', '.')
-        return float(cleaned)
-    except (ValueError, AttributeError):
-        return None
-
-
-def _parse_area(area_str: str):
-    """'75 m²' → 75.0"""
-    if not area_str or area_str == 'N/A':
-        return None
-    try:
-        match = re.search(r'[\d,.]+', area_str)
-        return float(match.group().replace(',', '.')) if match else None
-    except (ValueError, AttributeError):
-        return None
-
-
 # --- HTML PARSING ---
 
 def parse_html_page(html_content):
@@ -114,18 +102,68 @@ async def fetch_page(session, url, semaphore):
     return None
 
 
+# --- SCRAPING + SCD UPSERT ---
+
+async def process_unit(session, semaphore, unit, cursor, conn, scraped_urls: list, stats: dict):
+    """
+    Scrapes one work unit (kategorija × transakcija × page batch).
+    Fetches all pages of the batch concurrently, then batch-normalizes and upserts.
+    """
+    batch_start, batch_end = unit.part
+    print(f"\n--- Batch: {unit} ---")
+
+    # Fetch all pages in batch concurrently
+    tasks = [
+        fetch_page(session, BASE_URL.format(kategorija=CATEGORIES[unit.scope], page=page_num),
+                   semaphore)
+        for page_num in range(batch_start, batch_end + 1)
+    ]
+    html_pages_batch = await asyncio.gather(*tasks)
+
+    # Parse all fetched pages
+    batch_ads = []
+    for html in html_pages_batch:
+        if html:
+            batch_ads.extend(parse_html_page(html))
+
+    if not batch_ads:
+        print(f"   [{unit}] No ads found in this batch.")
+        return 0
+
+    print(f"   ✅ [{unit}] Found {len(batch_ads)} ads in batch.")
+
+    # Normalize the whole batch and run batch SCD Type 2 upsert
+    batch = normalize_batch(batch_ads, IZVOR, *unit.scope)
+    for result, count in upsert_ads_batch(cursor, batch).items():
+        stats[result] += count
+    scraped_urls.extend(batch['url'])
+
+    # Commit after each batch (also commits finished batches of other in-flight units)
+    conn.commit()
+    print(f"   💾 [{unit}] Batch committed. Stats so far: {stats}")
+    return len(batch_ads)
+
+
 # --- MAIN ---
 
-async def main():
+def page_batches(kategorija, transakcija):
+    """Page ranges of BATCH_SIZE pages between START_PAGE and END_PAGE."""
+    return [(i, min(i + BATCH_SIZE - 1, END_PAGE))
+            for i in range(START_PAGE, END_PAGE + 1, BATCH_SIZE)]
+
+
+async def main(scopes: list):
     start_time = time.time()
 
+    units = build_units(scopes, page_batches)
+
     print(f"🚀 Starting oglasi.rs scraper")
     print(f"Pages: {START_PAGE}-{END_PAGE} | Batch size: {BATCH_SIZE}")
+    print(f"Categories: {scopes} | work units: {len(units)}")
 
-    semaphore            = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
-    scraped_urls         = []  # collects all seen URLs for removed ad detection
-    total_ads_all_ranges = 0
-    stats                = {'inserted': 0, 'changed': 0, 'unchanged': 0}
+    semaphore    = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    scraped_urls = []  # all URLs seen this run, for removed ad detection
+    stats        = {'inserted': 0, 'changed': 0, 'unchanged': 0}
 
     # Single PostgreSQL connection for the entire run
     conn   = get_db_connection()
@@ -133,62 +171,23 @@ async def main():
 
     try:
         async with aiohttp.ClientSession(headers=HEADERS) as session:
-            for i in range(START_PAGE, END_PAGE + 1, BATCH_SIZE):
-                batch_start = i
-                batch_end   = min(i + BATCH_SIZE - 1, END_PAGE)
-                print(f"\n--- Batch: pages {batch_start} to {batch_end} ---")
-
-                # Fetch all pages in batch concurrently
-                tasks = [
-                    fetch_page(session, BASE_URL.format(page_num), semaphore)
-                    for page_num in range(batch_start, batch_end + 1)
-                ]
-                html_pages_batch = await asyncio.gather(*tasks)
-
-                # Parse all fetched pages
-                batch_ads = []
-                for html in html_pages_batch:
-                    if html:
-                        batch_ads.extend(parse_html_page(html))
-
-                if not batch_ads:
-                    print("   No ads found in this batch.")
-                    continue
-
-                print(f"   ✅ Found {len(batch_ads)} ads in batch.")
-
-                # Normalize each ad and run SCD Type 2 upsert
-                for ad in batch_ads:
-                    ad_normalized = {
-                        'url':        ad['Link'],
-                        'naslov':     ad['Naslov'],
-                        'cena':       _parse_price(ad['Cena']),
-                        'cena_po_m2': None,           # not available on oglasi.rs
-                        'lokacija':   ad['Lokacija'],
-                        'grad':       ad['Grad'],      # oglasi.rs provides city directly
-                        'kvadratura': _parse_area(ad['Kvadratura']),
-                        'tip_stana':  None,            # not available on oglasi.rs
-                        'sobnost':    ad['Sobnost'],
-                        'sprat':      ad['Sprat'],
-                        'izvor':      IZVOR
-                    }
-
-                    result = upsert_ad_scd2(cursor, ad_normalized)
-                    stats[result] += 1
-
-                    if ad_normalized['url'] != 'N/A':
-                        scraped_urls.append(ad_normalized['url'])
-
-                total_ads_all_ranges += len(batch_ads)
-
-                # Commit after each batch
-                conn.commit()
-                print(f"   💾 Batch committed. Stats so far: {stats}")
-
-        # Mark ads not seen today as removed (SCD Type 2 close)
-        removed = mark_removed_ads(cursor, scraped_urls, IZVOR)
-        conn.commit()
-        print(f"🗑️  Marked {removed} ads as removed")
+            totals = await run_units(
+                units,
+                lambda unit: process_unit(session, semaphore, unit, cursor, conn,
+                                          scraped_urls, stats),
+                MAX_PARALLEL_UNITS
+            )
+
+        # Mark ads not seen today as removed, per category (SCD Type 2 close).
+        # URLs seen in any category count as seen, so a listing that moved
+        # between categories is not closed by its old category.
+        for kategorija, transakcija in scopes:
+            if not totals.get((kategorija, transakcija)):
+                print(f"⚠️  {kategorija}/{transakcija}: no ads scraped, skipping removal")
+                continue
+            removed = mark_removed_ads(cursor, scraped_urls, IZVOR, kategorija, transakcija)
+            conn.commit()
+            print(f"🗑️  {kategorija}/{transakcija}: marked {removed} ads as removed")
 
     except Exception as e:
         conn.rollback()  # undo uncommitted changes on error
@@ -202,9 +201,18 @@ async def main():
     print("🏁 SCRAPING COMPLETE")
     print("=" * 50)
     print(f"\n📊 Final stats: {stats}")
-    print(f"🗃️  Total ads processed: {total_ads_all_ranges}")
+    for (kategorija, transakcija), total in totals.items():
+        print(f"   {kategorija}/{transakcija}: {total} ads")
+    print(f"🗃️  Total ads processed: {sum(totals.values())}")
     print(f"⏱️  Total time: {time.time() - start_time:.2f}s")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=f'Scrape {IZVOR} listings.')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profile the run (cProfile + flamegraph samples + slow callbacks)')
+    add_crawl_arguments(parser, CATEGORIES)
+    args = parser.parse_args()
+
+    scopes = select_scopes(CATEGORIES, args.kategorije, args.transakcije)
+    profiling.run(main(scopes), name=IZVOR, enabled=args.profile)
@@ -0,0 +1,331 @@
+"""
+Inkrementalni indeks cene po m² za Real Estate Serbia.
+
+Umesto da v_price_changes / dashboard svaki put prolaze kroz celu 'ads'
+istoriju, ovaj modul jednom dnevno (Airflow task posle validacije) ažurira
+tabelu price_index_daily samo iz današnjih SCD delti:
+
+    valid_from = dan   → oglas ulazi u aktivni skup   (+1)
+    valid_to   = dan   → oglas izlazi iz aktivnog skupa (-1)
+
+Za svaki (grad, lokacija, izvor) čuvamo PriceSketch — log-bucket histogram
+(DDSketch princip) koji se može sabirati i oduzimati, pa je stanje za dan D
+jednako stanju za dan D-1 + delte dana D. Medijan i kvantili se čitaju iz
+sketch-a sa relativnom greškom od SKETCH_ALPHA.
+
+price_index_daily čuva samo brojače i kvantile; sketch-evi su stanje za
+sledeći run i žive u price_index_state, koja se prepisuje svakim run-om.
+
+Sentinel '*' u koloni lokacija znači "ceo grad", u koloni izvor "svi izvori".
+Indeks pokriva samo prodaju stanova (INDEX_SCOPE_SQL) — zakup i zemljišta
+imaju neuporedive cene po m².
+
+Pokretanje:
+    python price_index.py                    # danas
+    python price_index.py --date 2026-03-01  # određeni dan (i propušteni pre njega)
+"""
+
+import argparse
+import math
+from datetime import date, timedelta
+
+from psycopg2.extras import Json, execute_values
+
+from scd_utils import get_db_connection
+
+# --- SETTINGS ---
+SKETCH_ALPHA = 0.01          # relativna greška kvantila (1%)
+QUANTILES    = (0.10, 0.25, 0.50, 0.75, 0.90)
+ALL          = '*'           # sentinel za agregat preko lokacija / izvora
+
+# Cena po m²: koristimo cena_po_m2 sa sajta, a ako je nema računamo je
+PRICE_M2_SQL = "COALESCE(cena_po_m2, cena / NULLIF(kvadratura, 0))"
+INDEX_SCOPE_SQL = "kategorija = 'stanovi' AND transakcija = 'prodaja'"
+
+
+# --- SKETCH ---
+
+class PriceSketch:
+    """
+    Mergeable kvantilni sketch: broj vrednosti po logaritamskom bucket-u.
+
+    Bucket i pokriva (gamma^(i-1), gamma^i], gde je gamma = (1+a)/(1-a),
+    pa je svaka procena kvantila unutar relativne greške a. Pošto su u
+    pitanju samo brojači, sketch podržava i uklanjanje vrednosti.
+    """
+
+    def __init__(self, alpha: float = SKETCH_ALPHA, buckets: dict = None):
+        self.alpha      = alpha
+        self.gamma      = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets    = dict(buckets or {})
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def add(self, value: float, count: int = 1):
+        """Dodaje (count > 0) ili uklanja (count < 0) vrednost iz sketch-a."""
+        if value is None or value <= 0:
+            return
+        key = self._key(value)
+        new_count = self.buckets.get(key, 0) + count
+        if new_count > 0:
+            self.buckets[key] = new_count
+        else:
+            self.buckets.pop(key, None)
+
+    def quantile(self, q: float):
+        """Vraća procenu q-kvantila, ili None za prazan sketch."""
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.buckets))
+
+    def to_json(self) -> dict:
+        return {'alpha': self.alpha,
+                'buckets': {str(k): v for k, v in self.buckets.items()}}
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'PriceSketch':
+        return cls(alpha=data['alpha'],
+                   buckets={int(k): v for k, v in data['buckets'].items()})
+
+
+# --- STATE ---
+
+class IndexEntry:
+    """Stanje jednog (grad, lokacija, izvor) ključa za jedan dan."""
+
+    def __init__(self, sketch: PriceSketch = None):
+        self.sketch        = sketch or PriceSketch()
+        self.new_count     = 0
+        self.changed_count = 0
+        self.removed_count = 0
+
+    def reset_flows(self):
+        self.new_count = self.changed_count = self.removed_count = 0
+
+    def has_data(self) -> bool:
+        return (self.sketch.count > 0 or self.new_count
+                or self.changed_count or self.removed_count)
+
+
+def _neighborhood(grad: str, lokacija: str):
+    """
+    Svodi lokaciju na naziv naselja, isti format za oba izvora:
+    nekretnine.rs 'Beograd, Vračar, ...' → 'Vračar', oglasi.rs 'Vračar' → 'Vračar'.
+    """
+    if not lokacija:
+        return None
+    parts = [part.strip() for part in lokacija.split(',')]
+    if len(parts) > 1 and parts[0] == grad:
+        return parts[1]
+    return parts[0]
+
+
+def _index_keys(grad: str, lokacija: str, izvor: str):
+    """Svaki red ads doprinosi gradu i lokaciji, po izvoru i za sve izvore."""
+    lokacija = _neighborhood(grad, lokacija)
+    keys = [(grad, ALL, izvor), (grad, ALL, ALL)]
+    if lokacija:
+        keys += [(grad, lokacija, izvor), (grad, lokacija, ALL)]
+    return keys
+
+
+def _apply_row(state: dict, grad, lokacija, izvor, price_m2, sign, change_reason, version,
+               update_sketch: bool = True):
+    """
+    Primenjuje jednu SCD deltu (+1 otvoren / -1 zatvoren red) na stanje.
+
+    Otvoreni red je nov oglas ako je version = 1 — change_reason ne može da
+    posluži jer ga mark_removed_ads() kasnije prepiše u 'removed'.
+    """
+    for key in _index_keys(grad, lokacija, izvor):
+        entry = state.setdefault(key, IndexEntry())
+        if update_sketch:
+            entry.sketch.add(float(price_m2), sign)
+        if sign > 0 and version == 1:
+            entry.new_count += 1
+        elif sign > 0:
+            entry.changed_count += 1
+        elif change_reason == 'removed':
+            entry.removed_count += 1
+
+
+# --- DATABASE ---
+
+def _load_state(cursor):
+    """
+    Učitava sačuvano stanje (sketch-eve na kraju poslednjeg indeksiranog dana).
+
+    Returns:
+        (datum stanja ili None, dict ključ → IndexEntry)
+    """
+    cursor.execute("SELECT grad, lokacija, izvor, sketch, index_date FROM price_index_state")
+    rows = cursor.fetchall()
+    if not rows:
+        return None, {}
+
+    state = {
+        (grad, lokacija, izvor): IndexEntry(PriceSketch.from_json(sketch))
+        for grad, lokacija, izvor, sketch, _ in rows
+    }
+    return rows[0][4], state
+
+
+def _save_state(cursor, day: date, state: dict):
+    """Prepisuje price_index_state stanjem na kraju dana 'day'."""
+    cursor.execute("DELETE FROM price_index_state")
+    execute_values(cursor, """
+        INSERT INTO price_index_state (index_date, grad, lokacija, izvor, sketch)
+        VALUES %s
+    """, [
+        (day, grad, lokacija, izvor, Json(entry.sketch.to_json()))
+        for (grad, lokacija, izvor), entry in state.items()
+        if entry.sketch.count > 0
+    ])
+
+
+def _bootstrap_state(cursor, day: date) -> dict:
+    """
+    Prvi run: gradi stanje iz snapshot-a aktivnih oglasa na kraju dana 'day'.
+    Red je aktivan u danu D ako valid_from <= D < valid_to (ili valid_to IS NULL).
+    """
+    state = {}
+    cursor.execute(f"""
+        SELECT grad, lokacija, izvor, {PRICE_M2_SQL}
+        FROM ads
+        WHERE valid_from <= %s
+          AND (valid_to IS NULL OR valid_to > %s)
+          AND grad IS NOT NULL
+          AND {PRICE_M2_SQL} > 0
+          AND {INDEX_SCOPE_SQL}
+    """, (day, day))
+    for grad, lokacija, izvor, price_m2 in cursor.fetchall():
+        for key in _index_keys(grad, lokacija, izvor):
+            state.setdefault(key, IndexEntry()).sketch.add(float(price_m2))
+
+    # Tokovi (novi/promenjeni/uklonjeni) za sam dan bootstrap-a
+    # (snapshot ih već sadrži, pa sketch ne diramo)
+    for row in _fetch_deltas(cursor, day):
+        _apply_row(state, *row, update_sketch=False)
+    return state
+
+
+def _fetch_deltas(cursor, day: date) -> list:
+    """SCD delte jednog dana: redovi otvoreni (+1) i zatvoreni (-1) tog dana."""
+    cursor.execute(f"""
+        SELECT grad, lokacija, izvor, {PRICE_M2_SQL}, 1, change_reason, version
+        FROM ads
+        WHERE valid_from = %s AND grad IS NOT NULL AND {PRICE_M2_SQL} > 0
+          AND {INDEX_SCOPE_SQL}
+        UNION ALL
+        SELECT grad, lokacija, izvor, {PRICE_M2_SQL}, -1, change_reason, version
+        FROM ads
+        WHERE valid_to = %s AND grad IS NOT NULL AND {PRICE_M2_SQL} > 0
+          AND {INDEX_SCOPE_SQL}
+    """, (day, day))
+    return cursor.fetchall()
+
+
+def _save_day(cursor, day: date, state: dict) -> int:
+    """Upisuje indeks za jedan dan (idempotentno — briše postojeće redove)."""
+    cursor.execute("DELETE FROM price_index_daily WHERE index_date = %s", (day,))
+
+    rows = []
+    for (grad, lokacija, izvor), entry in state.items():
+        if not entry.has_data():
+            continue
+        p10, p25, median, p75, p90 = (entry.sketch.quantile(q) for q in QUANTILES)
+        rows.append((
+            day, grad, lokacija, izvor,
+            entry.sketch.count, entry.new_count, entry.changed_count, entry.removed_count,
+            p10, p25, median, p75, p90
+        ))
+
+    execute_values(cursor, """
+        INSERT INTO price_index_daily (
+            index_date, grad, lokacija, izvor,
+            active_count, new_count, changed_count, removed_count,
+            p10, p25, median, p75, p90
+        ) VALUES %s
+    """, rows)
+    return len(rows)
+
+
+# --- MAIN ---
+
+def update_price_index(cursor, day: date) -> int:
+    """
+    Ažurira price_index_daily zaključno sa danom 'day'.
+
+    Ako je poslednji indeks stariji od juče, propušteni dani se obrađuju
+    redom (svaki iz svojih delti). Bez prethodnog stanja, ili kada se
+    ponovo računa već indeksiran dan (čuva se samo poslednje stanje),
+    radi se bootstrap iz snapshot-a.
+
+    Returns:
+        Broj upisanih redova za dan 'day'
+    """
+    last_date, state = _load_state(cursor)
+
+    if last_date is None or last_date >= day:
+        reason = 'No previous index' if last_date is None else f"Index state is at {last_date}"
+        print(f"📦 {reason} — bootstrapping from snapshot at {day}")
+        state = _bootstrap_state(cursor, day)
+        written = _save_day(cursor, day, state)
+        _save_state(cursor, day, state)
+        return written
+
+    current = last_date + timedelta(days=1)
+    written = 0
+    while current <= day:
+        for entry in state.values():
+            entry.reset_flows()
+        for row in _fetch_deltas(cursor, current):
+            _apply_row(state, *row)
+        written = _save_day(cursor, current, state)
+        print(f"   📈 {current}: {written} index rows")
+        current += timedelta(days=1)
+
+    _save_state(cursor, day, state)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Update daily price-per-m² index.')
+    parser.add_argument('--date', type=date.fromisoformat, default=date.today(),
+                        help='Index date (YYYY-MM-DD), default: today')
+    args = parser.parse_args()
+
+    conn   = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        written = update_price_index(cursor, args.date)
+        conn.commit()
+        print(f"✅ Price index updated for {args.date}: {written} rows")
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Price index update failed: {e}")
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
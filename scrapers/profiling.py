@@ -0,0 +1,170 @@
+"""
+Profiling mode za scraper run-ove (--profile).
+
+Kada je uključen, jedan run skuplja:
+    - cProfile statistiku event loop-a i svih thread-ova pokrenutih tokom run-a
+      (worker pool-ovi) → <run>_top.txt, top-N funkcija po tottime i cumtime
+    - sampling stack-ove svih thread-ova → <run>.folded, format za
+      flamegraph.pl / speedscope / inferno
+    - blokirajuće periode event loop-a (callback duži od SLOW_CALLBACK_SECONDS)
+      preko asyncio debug mode-a → <run>_slow_callbacks.txt
+
+Kada je isključen, run(...) je samo asyncio.run(...) — nema nikakvog overhead-a.
+"""
+
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+# --- SETTINGS ---
+PROFILE_DIR           = os.environ.get('PROFILE_DIR', 'profiles')
+SAMPLE_INTERVAL       = 0.005   # sekundi između dva uzorka stack-a
+SLOW_CALLBACK_SECONDS = 0.05    # callback duži od ovoga blokira loop
+TOP_N                 = 40
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """Hvata asyncio debug upozorenja 'Executing <Handle ...> took X seconds'."""
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.records = []
+
+    def emit(self, record):
+        message = record.getMessage()
+        if message.startswith('Executing'):
+            self.records.append((record.created, message))
+
+
+class _StackSampler(threading.Thread):
+    """Periodično uzorkuje stack svakog thread-a i broji folded stack-ove."""
+
+    def __init__(self, interval: float):
+        super().__init__(name='profiling-sampler', daemon=True)
+        self.interval    = interval
+        self.stacks      = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                                 f":{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class RunProfiler:
+    """Context manager koji profiliše jedan scraper run i piše izveštaje."""
+
+    def __init__(self, name: str, output_dir: str = PROFILE_DIR):
+        stamp           = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.output_dir = output_dir
+        self.prefix     = os.path.join(output_dir, f"{name}_{stamp}")
+
+        self._profiler        = cProfile.Profile()
+        self._thread_profiles = []
+        self._sampler         = _StackSampler(SAMPLE_INTERVAL)
+        self._slow_handler    = _SlowCallbackHandler()
+        self._started         = None
+
+    # --- thread profiling ---
+
+    def _profile_thread(self, frame, event, arg):
+        """threading.setprofile hook: svaki novi thread dobija svoj cProfile."""
+        profiler = cProfile.Profile()
+        self._thread_profiles.append(profiler)
+        profiler.enable()
+
+    # --- lifecycle ---
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        self._sampler.start()   # pre setprofile, da sampler ne bi bio profilisan
+        logging.getLogger('asyncio').addHandler(self._slow_handler)
+        threading.setprofile(self._profile_thread)
+        self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profiler.disable()
+        threading.setprofile(None)
+        logging.getLogger('asyncio').removeHandler(self._slow_handler)
+        self._sampler.stop()
+        self._write_reports(time.perf_counter() - self._started)
+        return False
+
+    async def watch(self, coro):
+        """Omotač oko main() koji podešava prag za spore callback-ove."""
+        asyncio.get_running_loop().slow_callback_duration = SLOW_CALLBACK_SECONDS
+        return await coro
+
+    # --- reports ---
+
+    def _write_reports(self, elapsed: float):
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        # Flamegraph: jedan folded stack po liniji + broj uzoraka
+        with open(f"{self.prefix}.folded", 'w') as f:
+            for stack, count in self._sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        # Top-N hot funkcije (main thread + svi worker thread-ovi)
+        stats = pstats.Stats(self._profiler, stream=io.StringIO())
+        for profiler in self._thread_profiles:
+            stats.add(profiler)
+        with open(f"{self.prefix}_top.txt", 'w') as f:
+            f.write(f"Wall time: {elapsed:.2f}s | "
+                    f"threads profiled: {1 + len(self._thread_profiles)} | "
+                    f"samples: {sum(self._sampler.stacks.values())}\n")
+            stats.stream = f
+            for sort_key in ('tottime', 'cumulative'):
+                f.write(f"\n{'=' * 30} by {sort_key} {'=' * 30}\n")
+                stats.sort_stats(sort_key).print_stats(TOP_N)
+
+        # Blokirajući periodi event loop-a
+        blocked = self._slow_handler.records
+        with open(f"{self.prefix}_slow_callbacks.txt", 'w') as f:
+            f.write(f"Threshold: {SLOW_CALLBACK_SECONDS}s | slow callbacks: {len(blocked)}\n\n")
+            for created, message in blocked:
+                f.write(f"{datetime.fromtimestamp(created).isoformat()}  {message}\n")
+
+        print(f"🔬 Profile written: {self.prefix}.folded, "
+              f"{self.prefix}_top.txt, {self.prefix}_slow_callbacks.txt")
+
+
+def run(coro, name: str, enabled: bool = False):
+    """
+    asyncio.run(coro), opciono pod profilerom.
+
+    Args:
+        coro: main() korutina scrapera
+        name: prefiks izlaznih fajlova (npr. izvor)
+        enabled: vrednost --profile opcije
+    """
+    if not enabled:
+        return asyncio.run(coro)
+
+    profiler = RunProfiler(name)
+    with profiler:
+        return asyncio.run(profiler.watch(coro), debug=True)
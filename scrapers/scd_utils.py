@@ -4,20 +4,32 @@ Analogno upsert_listing() logici iz AutoScout scrapers.
 """
 
 import psycopg2
+import csv
+import io
 import os
 from datetime import date
 
+# Kolone koje upsert_ads_batch() COPY-uje u staging tabelu
+STAGING_COLUMNS = (
+    'url', 'naslov', 'cena', 'cena_po_m2', 'lokacija', 'grad', 'kvadratura',
+    'tip_stana', 'sobnost', 'sprat', 'sobnost_num', 'sprat_num', 'izvor',
+    'kategorija', 'transakcija'
+)
 
-def get_db_connection():
+
+def get_db_connection(database: str = None):
     """
     Kreira konekciju na PostgreSQL.
     Čita kredencijale iz environment varijabli (Docker injektuje ove).
     Ako nema env varijabli, koristi localhost defaults za lokalni razvoj.
+
+    Args:
+        database: opciono ime baze umesto DB_NAME (npr. benchmark baza)
     """
     return psycopg2.connect(
         host=os.environ.get('DB_HOST', 'localhost'),
         port=os.environ.get('DB_PORT', '5432'),
-        database=os.environ.get('DB_NAME', 'real_estate'),
+        database=database or os.environ.get('DB_NAME', 'real_estate'),
         user=os.environ.get('DB_USER', 'postgres'),
         password=os.environ.get('DB_PASSWORD', 'postgres123')
     )
@@ -34,8 +46,8 @@ def upsert_ad_scd2(cursor, ad_data: dict) -> str:
     Logika:
         URL nije u bazi   → INSERT (version=1, is_current=TRUE)
         URL postoji:
-            Cena/kvadratura se promenila → zatvori stari red + INSERT novi
-            Ništa se nije promenilo      → samo ažuriraj updated_at
+            Cena/kvadratura/kategorija se promenila → zatvori stari red + INSERT novi
+            Ništa se nije promenilo                 → samo ažuriraj updated_at
 
     Returns:
         'inserted', 'changed', ili 'unchanged'
@@ -46,7 +58,7 @@ def upsert_ad_scd2(cursor, ad_data: dict) -> str:
     # Proveri da li postoji aktivan oglas sa ovim URL-om
     # Analogno: existing = await conn.fetchrow('SELECT ... FROM ads WHERE listing_id = $1')
     cursor.execute("""
-        SELECT id, cena, kvadratura, version
+        SELECT id, cena, kvadratura, version, kategorija, transakcija
         FROM ads
         WHERE url = %s AND is_current = TRUE
     """, (url,))
@@ -60,11 +72,13 @@ def upsert_ad_scd2(cursor, ad_data: dict) -> str:
         cursor.execute("""
             INSERT INTO ads (
                 url, naslov, cena, cena_po_m2, lokacija, grad,
-                kvadratura, tip_stana, sobnost, sprat, izvor,
+                kvadratura, tip_stana, sobnost, sprat, sobnost_num, sprat_num, izvor,
+                kategorija, transakcija,
                 valid_from, valid_to, is_current, version, change_reason
             ) VALUES (
                 %s, %s, %s, %s, %s, %s,
-                %s, %s, %s, %s, %s,
+                %s, %s, %s, %s, %s, %s, %s,
+                %s, %s,
                 %s, NULL, TRUE, 1, 'first_seen'
             )
         """, (
@@ -78,7 +92,11 @@ def upsert_ad_scd2(cursor, ad_data: dict) -> str:
             ad_data.get('tip_stana'),
             ad_data.get('sobnost'),
             ad_data.get('sprat'),
+            ad_data.get('sobnost_num'),
+            ad_data.get('sprat_num'),
             ad_data['izvor'],
+            ad_data.get('kategorija'),
+            ad_data.get('transakcija'),
             today
         ))
         return 'inserted'
@@ -86,7 +104,7 @@ def upsert_ad_scd2(cursor, ad_data: dict) -> str:
     # -------------------------------------------------------
     # POSTOJEĆI OGLAS — proveri promene
     # -------------------------------------------------------
-    ad_id, old_cena, old_kvadratura, current_version = existing
+    ad_id, old_cena, old_kvadratura, current_version, old_kategorija, old_transakcija = existing
 
     new_cena       = ad_data.get('cena')
     new_kvadratura = ad_data.get('kvadratura')
@@ -101,8 +119,13 @@ def upsert_ad_scd2(cursor, ad_data: dict) -> str:
 
     cena_changed       = normalize(old_cena) != normalize(new_cena)
     kvadratura_changed = normalize(old_kvadratura) != normalize(new_kvadratura)
+    # Oglas koji je sajt prebacio u drugu kategoriju dobija novu verziju,
+    # da bi ga removal i price index videli u novom scope-u
+    scope_changed      = (ad_data.get('kategorija') is not None and
+                          (old_kategorija, old_transakcija) !=
+                          (ad_data.get('kategorija'), ad_data.get('transakcija')))
 
-    if cena_changed or kvadratura_changed:
+    if cena_changed or kvadratura_changed or scope_changed:
         # Odredi razlog promene
         if cena_changed and new_cena and old_cena:
             change_reason = 'price_decreased' if new_cena < old_cena else 'price_increased'
@@ -123,11 +146,13 @@ def upsert_ad_scd2(cursor, ad_data: dict) -> str:
         cursor.execute("""
             INSERT INTO ads (
                 url, naslov, cena, cena_po_m2, lokacija, grad,
-                kvadratura, tip_stana, sobnost, sprat, izvor,
+                kvadratura, tip_stana, sobnost, sprat, sobnost_num, sprat_num, izvor,
+                kategorija, transakcija,
                 valid_from, valid_to, is_current, version, change_reason
             ) VALUES (
                 %s, %s, %s, %s, %s, %s,
-                %s, %s, %s, %s, %s,
+                %s, %s, %s, %s, %s, %s, %s,
+                %s, %s,
                 %s, NULL, TRUE, %s, %s
             )
         """, (
@@ -141,7 +166,11 @@ def upsert_ad_scd2(cursor, ad_data: dict) -> str:
             ad_data.get('tip_stana'),
             ad_data.get('sobnost'),
             ad_data.get('sprat'),
+            ad_data.get('sobnost_num'),
+            ad_data.get('sprat_num'),
             ad_data['izvor'],
+            ad_data.get('kategorija'),
+            ad_data.get('transakcija'),
             today,
             current_version + 1,
             change_reason
@@ -156,14 +185,159 @@ def upsert_ad_scd2(cursor, ad_data: dict) -> str:
         return 'unchanged'
 
 
-def mark_removed_ads(cursor, scraped_urls: list, izvor: str) -> int:
+def upsert_ads_batch(cursor, columns: dict) -> dict:
+    """
+    SCD Type 2 upsert za ceo batch odjednom (ista logika kao upsert_ad_scd2).
+
+    Batch (kolone iz normalize.normalize_batch) se COPY-uje u privremenu
+    staging tabelu, a zatim se set-based upitima:
+        1. klasifikuje svaki URL: inserted / changed / unchanged
+           (promena kategorije/transakcije je takođe 'changed')
+        2. zatvaraju stari redovi promenjenih oglasa
+        3. osvežava updated_at nepromenjenih
+        4. insertuju novi oglasi i nove verzije promenjenih
+
+    Umesto 2-3 round-trip-a po oglasu, ovo je fiksan broj upita po batch-u.
+    Ako se URL ponavlja u batch-u, važi poslednje pojavljivanje.
+
+    Returns:
+        {'inserted': n, 'changed': n, 'unchanged': n}
+    """
+    stats = {'inserted': 0, 'changed': 0, 'unchanged': 0}
+    rows  = list(zip(*(columns[name] for name in STAGING_COLUMNS)))
+    if not rows:
+        return stats
+
+    today = date.today()
+
+    # Staging tabela živi do kraja sesije, praznimo je za svaki batch
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS ads_staging (
+            seq         SERIAL,
+            url         TEXT NOT NULL,
+            naslov      TEXT,
+            cena        NUMERIC(20, 2),
+            cena_po_m2  NUMERIC(20, 2),
+            lokacija    TEXT,
+            grad        TEXT,
+            kvadratura  NUMERIC(8, 2),
+            tip_stana   TEXT,
+            sobnost     TEXT,
+            sprat       TEXT,
+            sobnost_num NUMERIC(3, 1),
+            sprat_num   SMALLINT,
+            izvor       TEXT NOT NULL,
+            kategorija  TEXT,
+            transakcija TEXT,
+            action      TEXT DEFAULT 'inserted',
+            old_id      INTEGER,
+            old_cena    NUMERIC(20, 2),
+            old_version INTEGER
+        )
+    """)
+    cursor.execute("TRUNCATE ads_staging")
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY ads_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+    # Duplikati URL-a u batch-u → zadrži poslednji
+    cursor.execute("""
+        DELETE FROM ads_staging a
+        USING ads_staging b
+        WHERE a.url = b.url AND a.seq < b.seq
+    """)
+
+    # Korak 1: klasifikacija prema trenutnoj verziji
+    # IS DISTINCT FROM = normalize() poređenje iz upsert_ad_scd2 (NULL == NULL)
+    cursor.execute("""
+        UPDATE ads_staging s
+        SET action      = CASE
+                              WHEN a.cena IS DISTINCT FROM s.cena
+                                OR a.kvadratura IS DISTINCT FROM s.kvadratura
+                                OR (s.kategorija IS NOT NULL
+                                    AND (a.kategorija, a.transakcija)
+                                        IS DISTINCT FROM (s.kategorija, s.transakcija))
+                              THEN 'changed'
+                              ELSE 'unchanged'
+                          END,
+            old_id      = a.id,
+            old_cena    = a.cena,
+            old_version = a.version
+        FROM ads a
+        WHERE a.url = s.url AND a.is_current = TRUE
+    """)
+
+    # Korak 2: zatvori stare redove promenjenih oglasa
+    cursor.execute("""
+        UPDATE ads a
+        SET valid_to    = %s,
+            is_current  = FALSE,
+            updated_at  = NOW()
+        FROM ads_staging s
+        WHERE a.id = s.old_id AND s.action = 'changed'
+    """, (today,))
+
+    # Korak 3: bez promena — samo refresh timestamp
+    cursor.execute("""
+        UPDATE ads a
+        SET updated_at = NOW()
+        FROM ads_staging s
+        WHERE a.id = s.old_id AND s.action = 'unchanged'
+    """)
+
+    # Korak 4: novi oglasi (version=1) i nove verzije promenjenih
+    cursor.execute("""
+        INSERT INTO ads (
+            url, naslov, cena, cena_po_m2, lokacija, grad,
+            kvadratura, tip_stana, sobnost, sprat, sobnost_num, sprat_num, izvor,
+            kategorija, transakcija,
+            valid_from, valid_to, is_current, version, change_reason
+        )
+        SELECT
+            url, naslov, cena, cena_po_m2, lokacija, grad,
+            kvadratura, tip_stana, sobnost, sprat, sobnost_num, sprat_num, izvor,
+            kategorija, transakcija,
+            %s, NULL, TRUE,
+            COALESCE(old_version + 1, 1),
+            CASE
+                WHEN action = 'inserted'                  THEN 'first_seen'
+                WHEN cena IS DISTINCT FROM old_cena
+                 AND cena != 0 AND old_cena != 0
+                 AND cena < old_cena                      THEN 'price_decreased'
+                WHEN cena IS DISTINCT FROM old_cena
+                 AND cena != 0 AND old_cena != 0          THEN 'price_increased'
+                ELSE 'data_updated'
+            END
+        FROM ads_staging
+        WHERE action IN ('inserted', 'changed')
+    """, (today,))
+
+    cursor.execute("SELECT action, COUNT(*) FROM ads_staging GROUP BY action")
+    stats.update(dict(cursor.fetchall()))
+    return stats
+
+
+def mark_removed_ads(cursor, scraped_urls: list, izvor: str,
+                     kategorija: str = None, transakcija: str = None) -> int:
     """
     Oglasi koji nisu viđeni u današnjem run-u → is_current = FALSE.
     Analogno mark_inactive_listings() iz AutoScout koda.
 
+    Ako su zadati kategorija/transakcija, zatvaraju se samo oglasi iz tog
+    dela crawl-a — kategorija koja danas nije crawl-ovana ostaje netaknuta.
+    scraped_urls ipak treba da sadrži sve URL-ove izvora viđene danas: oglas
+    koji je sajt prebacio u drugu kategoriju je viđen, ne uklonjen.
+
     Args:
-        scraped_urls: lista svih URL-ova koje smo danas videli
+        scraped_urls: lista svih URL-ova izvora koje smo danas videli
         izvor: 'nekretnine.rs' ili 'oglasi.rs'
+        kategorija: npr. 'stanovi', 'kuce', 'zemljista' (None = ceo izvor)
+        transakcija: 'prodaja' ili 'izdavanje' (None = ceo izvor)
 
     Returns:
         Broj označenih oglasa
@@ -180,9 +354,12 @@ def mark_removed_ads(cursor, scraped_urls: list, izvor: str) -> int:
             updated_at  = NOW(),
             change_reason = 'removed'
         WHERE izvor       = %s
+          AND (%s::TEXT IS NULL OR kategorija  = %s)
+          AND (%s::TEXT IS NULL OR transakcija = %s)
           AND is_current  = TRUE
           AND url NOT IN %s
           AND valid_from  < %s
-    """, (today, izvor, tuple(scraped_urls), today))
+    """, (today, izvor, kategorija, kategorija, transakcija, transakcija,
+          tuple(scraped_urls), today))
 
     return cursor.rowcount
\ No newline at end of file
@@ -1,6 +1,7 @@
 -- ============================================================
 -- Real Estate Serbia - PostgreSQL SCD Type 2 Schema
--- Runs automatically when container is first created
+-- Runs automatically when container is first created;
+-- idempotent, so migrate_schema.py re-applies it on existing databases
 -- ============================================================
 
 CREATE TABLE IF NOT EXISTS ads (
@@ -20,7 +21,11 @@ CREATE TABLE IF NOT EXISTS ads (
     tip_stana   TEXT,
     sobnost     TEXT,
     sprat       TEXT,
+    sobnost_num NUMERIC(3, 1),  -- standardized: 'Dvoiposoban' → 2.5
+    sprat_num   SMALLINT,       -- standardized: 'PR' → 0, 'SU' → -1
     izvor       TEXT NOT NULL,  -- 'nekretnine.rs' or 'oglasi.rs'
+    kategorija  TEXT,           -- 'stanovi', 'kuce', 'zemljista'
+    transakcija TEXT,           -- 'prodaja' or 'izdavanje'
 
     -- SCD Type 2 columns
     valid_from    DATE NOT NULL,
@@ -38,12 +43,22 @@ CREATE TABLE IF NOT EXISTS ads (
     CONSTRAINT ads_version_positive CHECK (version >= 1)
 );
 
+-- Existing databases: add new columns
+-- (scrapers/migrate_schema.py re-applies this file before every DAG run;
+--  data backfills live in sql/migrations/)
+ALTER TABLE ads ADD COLUMN IF NOT EXISTS sobnost_num NUMERIC(3, 1);
+ALTER TABLE ads ADD COLUMN IF NOT EXISTS sprat_num   SMALLINT;
+ALTER TABLE ads ADD COLUMN IF NOT EXISTS kategorija  TEXT;
+ALTER TABLE ads ADD COLUMN IF NOT EXISTS transakcija TEXT;
+
 -- Indexes
 CREATE UNIQUE INDEX IF NOT EXISTS idx_ads_one_current_per_url ON ads(url) WHERE is_current = TRUE;
 CREATE INDEX IF NOT EXISTS idx_ads_url_current  ON ads(url, is_current);
 CREATE INDEX IF NOT EXISTS idx_ads_valid_range  ON ads(valid_from, valid_to);
 CREATE INDEX IF NOT EXISTS idx_ads_grad_current ON ads(grad) WHERE is_current = TRUE;
 CREATE INDEX IF NOT EXISTS idx_ads_izvor        ON ads(izvor);
+CREATE INDEX IF NOT EXISTS idx_ads_scope_current ON ads(izvor, kategorija, transakcija) WHERE is_current = TRUE;
+CREATE INDEX IF NOT EXISTS idx_ads_valid_to     ON ads(valid_to) WHERE valid_to IS NOT NULL;
 
 -- View: currently active ads
 CREATE OR REPLACE VIEW v_current_ads AS
@@ -52,7 +67,9 @@ SELECT
     kvadratura, sobnost, sprat, izvor,
     valid_from AS active_since,
     version,
-    CURRENT_DATE - valid_from AS days_active
+    CURRENT_DATE - valid_from AS days_active,
+    sobnost_num, sprat_num,
+    kategorija, transakcija
 FROM ads
 WHERE is_current = TRUE
   AND (change_reason IS NULL OR change_reason != 'removed');
@@ -75,6 +92,66 @@ WHERE a1.cena IS NOT NULL
   AND a2.cena IS NOT NULL
   AND a1.cena != a2.cena;
 
+-- ============================================================
+-- Price-per-m² index (updated incrementally by scrapers/price_index.py)
+-- Covers apartment sales only (kategorija = 'stanovi', transakcija = 'prodaja')
+-- lokacija = '*' → whole grad, izvor = '*' → all sources
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS price_index_daily (
+    index_date    DATE NOT NULL,
+    grad          TEXT NOT NULL,
+    lokacija      TEXT NOT NULL,
+    izvor         TEXT NOT NULL,
+
+    -- Counts: active ads at end of day + today's flows
+    active_count  INTEGER NOT NULL,
+    new_count     INTEGER NOT NULL DEFAULT 0,
+    changed_count INTEGER NOT NULL DEFAULT 0,
+    removed_count INTEGER NOT NULL DEFAULT 0,
+
+    -- Price per m² quantiles (from sketch, ~1% relative error)
+    p10     NUMERIC(20, 2),
+    p25     NUMERIC(20, 2),
+    median  NUMERIC(20, 2),
+    p75     NUMERIC(20, 2),
+    p90     NUMERIC(20, 2),
+
+    PRIMARY KEY (grad, lokacija, izvor, index_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_price_index_date ON price_index_daily(index_date);
+
+-- Mergeable quantile sketches at the end of the last indexed day
+-- (state for the next update, overwritten on every run)
+CREATE TABLE IF NOT EXISTS price_index_state (
+    index_date  DATE NOT NULL,
+    grad        TEXT NOT NULL,
+    lokacija    TEXT NOT NULL,
+    izvor       TEXT NOT NULL,
+    sketch      JSONB NOT NULL,
+
+    PRIMARY KEY (grad, lokacija, izvor)
+);
+
+-- View: daily price index per grad
+CREATE OR REPLACE VIEW v_price_index_grad AS
+SELECT
+    index_date, grad, izvor,
+    active_count, new_count, changed_count, removed_count,
+    p10, p25, median, p75, p90
+FROM price_index_daily
+WHERE lokacija = '*';
+
+-- View: daily price index per lokacija
+CREATE OR REPLACE VIEW v_price_index_lokacija AS
+SELECT
+    index_date, grad, lokacija, izvor,
+    active_count, new_count, changed_count, removed_count,
+    p10, p25, median, p75, p90
+FROM price_index_daily
+WHERE lokacija != '*';
+
 -- Validation function: checks SCD integrity
 CREATE OR REPLACE FUNCTION validate_scd_integrity()
 RETURNS TABLE(issue_type TEXT, url TEXT, details TEXT) AS $$
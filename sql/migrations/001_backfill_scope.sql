@@ -0,0 +1,12 @@
+-- ============================================================
+-- 001: crawl scope for rows scraped before multi-category crawling
+-- Those rows were residential sales (stanovi, plus kuce on nekretnine.rs)
+-- ============================================================
+
+UPDATE ads
+SET kategorija  = CASE
+                      WHEN izvor = 'nekretnine.rs' AND url LIKE '%/kuce/%' THEN 'kuce'
+                      ELSE 'stanovi'
+                  END,
+    transakcija = 'prodaja'
+WHERE kategorija IS NULL;
@@ -0,0 +1,19 @@
+-- ============================================================
+-- 002: price index sketches move from price_index_daily to price_index_state
+-- Latest day's sketches become the state, older ones are dropped
+-- ============================================================
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_name = 'price_index_daily' AND column_name = 'sketch') THEN
+        INSERT INTO price_index_state (index_date, grad, lokacija, izvor, sketch)
+        SELECT index_date, grad, lokacija, izvor, sketch
+        FROM price_index_daily
+        WHERE index_date = (SELECT MAX(index_date) FROM price_index_daily)
+          AND active_count > 0
+        ON CONFLICT DO NOTHING;
+
+        ALTER TABLE price_index_daily DROP COLUMN sketch;
+    END IF;
+END $$;